@@ -0,0 +1,279 @@
+import argparse
+import contextlib
+import csv
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from db_transaction import connect
+from import_car_spots import import_car_spots
+from import_cars import import_cars
+from exchange_yard import exchange_offlayout_to_yard
+from exchange_industries import exchange_from_yard
+from name_resolver import split_car_types
+from summarize_car_locations import summarize_car_locations
+
+# Resolved next to this file so the suite runs from any directory
+REPO_DIR = Path(__file__).resolve().parent
+SCHEMA_PATH = REPO_DIR / "schema.sql"
+SPOTS_CSV_PATH = REPO_DIR / "data" / "car_spots.csv"
+CARS_CSV_PATH = REPO_DIR / "data" / "cars.csv"
+BASELINE_PATH = REPO_DIR / "benchmark_baseline.json"
+
+DEFAULT_SCALES = [1, 10, 100, 1000]
+DEFAULT_THRESHOLD = 0.25
+# Absolute differences below these are treated as noise, whatever the ratio
+# (the exchanges pick cars with SQL RANDOM(), so small runs wobble a little)
+NOISE_FLOOR = {"wall_s": 0.1, "statements": 25, "peak_kib": 64.0}
+
+# Each layout copy gets one exchange of each kind on its copy of this yard,
+# up to BENCH_MAX_YARDS copies spread evenly across the layout. Every
+# exchange reads the whole layout, so uncapped the 1000x run is quadratic.
+BENCH_YARD = "Yard 1"
+BENCH_CARS = 5
+BENCH_MAX_YARDS = 100
+OFF_LAYOUT_SPOT_NAME = "OFF_LAYOUT"
+
+
+def read_csv(path: Path) -> List[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def write_csv(path: Path, rows: List[Dict[str, str]]):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def copy_suffix(k: int) -> str:
+    return "" if k == 1 else f" #{k}"
+
+
+def place_cars(spot_rows: List[Dict[str, str]], car_rows: List[Dict[str, str]]) -> List[str]:
+    # initial_spot for each car of one layout copy: yards filled to capacity,
+    # every other industry spot filled with a car it accepts, the rest staged.
+    # Leaving half the industries free gives exchange_from_yard real work.
+    placements = [""] * len(car_rows)
+    unplaced = list(range(len(car_rows)))
+    industry_seen = 0
+    for row in spot_rows:
+        industry_type = row["industry_type"].strip()
+        if industry_type == "Industry":
+            industry_seen += 1
+            if industry_seen % 2 == 0:
+                continue
+        elif industry_type != "Yard":
+            continue
+        allowed = {ct.upper() for ct in split_car_types(row["allowed_car_types"])}
+        free = int(row["capacity"])
+        for i in list(unplaced):
+            if free == 0:
+                break
+            if allowed and car_rows[i]["car_type"].strip().upper() not in allowed:
+                continue
+            placements[i] = row["spot_name"]
+            unplaced.remove(i)
+            free -= 1
+    return placements
+
+
+def build_layout_csvs(workdir: Path, scale: int):
+    # Copy every industry and car `scale` times. Copy 1 keeps the original
+    # names (so "Yard 1" always exists); later copies get a "#k" suffix.
+    # Each copy's cars start spread over that copy's yards and industries;
+    # there is still exactly one OFF_LAYOUT spot, sized to hold every car.
+    spot_rows = read_csv(SPOTS_CSV_PATH)
+    car_rows = read_csv(CARS_CSV_PATH)
+    layout_rows = [row for row in spot_rows if row["spot_name"].strip() != OFF_LAYOUT_SPOT_NAME]
+    placements = place_cars(layout_rows, car_rows)
+
+    spots: List[Dict[str, str]] = []
+    next_id = 1
+    for k in range(1, scale + 1):
+        for row in layout_rows:
+            spots.append(dict(
+                row,
+                spot_id=str(next_id),
+                industry_name=row["industry_name"] + copy_suffix(k),
+                spot_name=row["spot_name"] + copy_suffix(k),
+            ))
+            next_id += 1
+    for row in spot_rows:
+        if row["spot_name"].strip() == OFF_LAYOUT_SPOT_NAME:
+            spots.append(dict(row, spot_id=str(next_id), capacity=str(max(int(row["capacity"]), len(car_rows) * scale))))
+
+    cars: List[Dict[str, str]] = []
+    for k in range(1, scale + 1):
+        for row, spot in zip(car_rows, placements):
+            car_number = row["car_number"].strip()
+            cars.append(dict(
+                row,
+                car_number=car_number if k == 1 else f"{car_number}-{k}",
+                initial_spot=spot + copy_suffix(k) if spot else "",
+            ))
+
+    spots_csv = workdir / "car_spots.csv"
+    cars_csv = workdir / "cars.csv"
+    write_csv(spots_csv, spots)
+    write_csv(cars_csv, cars)
+    return spots_csv, cars_csv
+
+
+def create_db(db_path: Path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    conn.close()
+
+
+def benchmark_steps(conn, db: str, scale: int, spots_csv: Path, cars_csv: Path) -> List[tuple]:
+    # Every entry point, in the order an operating session would run them.
+    # The exchanges run on many layout copies, so their work grows with scale.
+    step = max(1, scale // BENCH_MAX_YARDS)
+    yards = [BENCH_YARD + copy_suffix(k) for k in range(1, scale + 1, step)]
+
+    def exchange_offlayout():
+        for yard in yards:
+            exchange_offlayout_to_yard(yard, BENCH_CARS, db_path=db, conn=conn)
+
+    def exchange_industries():
+        for yard in yards:
+            exchange_from_yard(db, yard, BENCH_CARS, conn=conn)
+
+    return [
+        ("import_car_spots", lambda: import_car_spots(db, spots_csv, "R", conn=conn)),
+        ("import_cars", lambda: import_cars(db, cars_csv, "R", conn=conn)),
+        ("exchange_offlayout_to_yard", exchange_offlayout),
+        ("exchange_from_yard", exchange_industries),
+        ("summarize_car_locations", lambda: summarize_car_locations(db, conn=conn)),
+    ]
+
+
+class StatementCounter:
+    # sqlite3 trace callback: counts every statement run on the connection
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, _sql):
+        self.count += 1
+
+
+def run_pass(scale: int, step_fn) -> Dict[str, Dict[str, float]]:
+    # Build a fresh layout and run each step through step_fn on one shared,
+    # traced connection
+    random.seed(scale)
+    with tempfile.TemporaryDirectory(prefix="railops-bench-") as tmp:
+        workdir = Path(tmp)
+        spots_csv, cars_csv = build_layout_csvs(workdir, scale)
+        db_path = workdir / "railcars.db"
+        create_db(db_path)
+        counter = StatementCounter()
+        conn = connect(db_path)
+        conn.set_trace_callback(counter)
+        results = {}
+        try:
+            with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                for name, fn in benchmark_steps(conn, str(db_path), scale, spots_csv, cars_csv):
+                    results[name] = step_fn(fn, counter)
+        finally:
+            conn.close()
+        return results
+
+
+def timed_step(fn: Callable[[], None], counter: StatementCounter) -> Dict[str, float]:
+    before = counter.count
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {"wall_s": round(elapsed, 4), "statements": counter.count - before}
+
+
+def memory_step(fn: Callable[[], None], _counter: StatementCounter) -> Dict[str, float]:
+    tracemalloc.start()
+    try:
+        fn()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peak_kib": round(peak / 1024, 1)}
+
+
+def run_benchmarks(scales: List[int]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    # Timing and memory come from separate passes over identical layouts so
+    # tracemalloc overhead does not leak into wall times.
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for scale in scales:
+        timings = run_pass(scale, timed_step)
+        memory = run_pass(scale, memory_step)
+        results[f"{scale}x"] = {name: {**timings[name], **memory[name]} for name in timings}
+        for name, metrics in results[f"{scale}x"].items():
+            print(f"{scale:>5}x  {name:<28} {metrics['wall_s']:>9.4f}s  {metrics['statements']:>9} stmts  {metrics['peak_kib']:>10.1f} KiB")
+    return results
+
+
+def find_regressions(results, baseline, threshold: float) -> List[str]:
+    regressions = []
+    for scale, steps in results.items():
+        for name, metrics in steps.items():
+            base = baseline.get(scale, {}).get(name)
+            if not base:
+                continue
+            for metric, value in metrics.items():
+                old = base.get(metric)
+                if old is None:
+                    continue
+                if value <= old * (1 + threshold):
+                    continue
+                if value - old < NOISE_FLOOR.get(metric, 0):
+                    continue
+                regressions.append(f"{scale} {name} {metric}: {old} → {value} (+{(value / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every railcar entry point at several layout sizes")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Multiples of the data/ CSV sizes to run (default: 1 10 100 1000)")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline JSON to compare against or --save to (default: benchmark_baseline.json next to this script)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed fractional regression per metric (default: 0.25)")
+    parser.add_argument("--save", action="store_true", help="Write this run as the new baseline instead of comparing")
+    args = parser.parse_args()
+
+    baseline_path = Path(args.baseline)
+    if not args.save and not baseline_path.exists():
+        # Nothing to compare against is a failure, not a pass
+        sys.exit(f"No baseline at {baseline_path}; run with --save to record one.")
+
+    results = run_benchmarks(args.scales)
+
+    if args.save:
+        # Merge so a partial run (e.g. --scales 1 10) keeps the other scales
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+        baseline.update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Baseline written to {baseline_path}")
+        return
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    missing = [scale for scale in results if scale not in baseline]
+    if missing:
+        sys.exit(f"No baseline for {', '.join(missing)} in {baseline_path}; run with --save to record it.")
+    regressions = find_regressions(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import contextlib
+import random
+import sqlite3
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+BUSY_TIMEOUT_MS = 5000
+MAX_ATTEMPTS = 6
+BASE_DELAY = 0.05
+MAX_DELAY = 2.0
+
+
+def connect(db_path, busy_timeout_ms: int = BUSY_TIMEOUT_MS) -> sqlite3.Connection:
+    # isolation_level=None turns off the module's implicit deferred BEGIN so
+    # transactions are opened explicitly with BEGIN IMMEDIATE below.
+    conn = sqlite3.connect(db_path, timeout=busy_timeout_ms / 1000, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+    # WAL lets readers (e.g. the summary watcher) keep going while an exchange writes
+    conn.execute("PRAGMA journal_mode = WAL")
+    return conn
+
+
+@contextlib.contextmanager
+def open_connection(db_path, conn: Optional[sqlite3.Connection] = None):
+    # Reuse the caller's connection (e.g. a railops batch) or open and close our own
+    if conn is not None:
+        yield conn
+        return
+    conn = connect(db_path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def is_busy_error(exc: sqlite3.OperationalError) -> bool:
+    msg = str(exc).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def run_immediate(
+    conn: sqlite3.Connection,
+    work: Callable[[sqlite3.Cursor], T],
+    max_attempts: int = MAX_ATTEMPTS,
+    base_delay: float = BASE_DELAY,
+    max_delay: float = MAX_DELAY,
+) -> T:
+    # Run work(cur) under BEGIN IMMEDIATE: the write lock is taken before work()
+    # reads anything, so the capacity checks it makes still hold at COMMIT.
+    # Lock contention rolls back and retries with jittered exponential backoff;
+    # any other error rolls back and propagates.
+    cur = conn.cursor()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            result = work(cur)
+            cur.execute("COMMIT")
+            return result
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                cur.execute("ROLLBACK")
+            if not is_busy_error(e) or attempt >= max_attempts:
+                raise
+            delay = min(max_delay, base_delay * (2 ** (attempt - 1)))
+            time.sleep(delay + random.uniform(0, delay))
+        except BaseException:
+            if conn.in_transaction:
+                cur.execute("ROLLBACK")
+            raise
+
+
+def check_spot_capacity(cur, occupancy_before: Dict[int, int]) -> None:
+    # Guard run just before COMMIT: refuse to overfill any spot this transaction
+    # added cars to. occupancy_before maps spot_id -> car count when the
+    # transaction read it; spots that were already over capacity (imports do
+    # not enforce it) only fail if this transaction made them fuller.
+    spot_ids = sorted(occupancy_before)
+    if not spot_ids:
+        return
+    placeholders = ",".join(["?" for _ in spot_ids])
+    cur.execute(f"""
+        SELECT cs.spot_id, cs.spot_name, cs.capacity, COUNT(c.car_number) AS occupancy
+        FROM car_spots cs
+        JOIN cars c ON c.spot_id = cs.spot_id
+        WHERE cs.spot_id IN ({placeholders})
+        GROUP BY cs.spot_id
+        HAVING COUNT(c.car_number) > cs.capacity
+    """, spot_ids)
+    over = [(name, cap, occ) for spot_id, name, cap, occ in cur.fetchall() if occ > occupancy_before[spot_id]]
+    if over:
+        details = ", ".join(f"{name} ({occ}/{cap})" for name, cap, occ in over)
+        raise RuntimeError(f"Spot capacity exceeded: {details}")
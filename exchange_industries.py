@@ -1,9 +1,10 @@
-import sqlite3
 import argparse
 import random
 from pathlib import Path
 from typing import List, Dict, Tuple
 
+from db_transaction import open_connection, run_immediate, check_spot_capacity
+
 DB_PATH = Path("railcars.db")
 
 
@@ -79,74 +80,99 @@ def find_occupant_of_spot(cur, spot_id: int):
     return row[0] if row else None
 
 
-def exchange_from_yard(db_path: str, yard_spot_name: str = None, num_to_move: int = None):
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-
-    # Choose yard (mirror exchange_yard inputs)
-    yards = fetch_yard_spots(cur)
-    if not yards:
-        print("No yard spots found in database.")
-        conn.close()
-        return
-
-    # If not provided via args, prompt like exchange_yard
-    if not yard_spot_name:
-        yard_spot_name = input("Enter Yard spot name: ").strip()
-
-    # find matching yard by name (case-insensitive)
-    matches = [i for i, y in enumerate(yards) if y[1].lower() == yard_spot_name.lower()]
-    if not matches:
-        print(f"Yard '{yard_spot_name}' not found. Available yards:")
-        for i, (_id, name, cap) in enumerate(yards, start=1):
-            print(f"  {i}. {name} (capacity={cap})")
-        selected_idx = choose_from_list("Select a yard:", [f"{n} (capacity={c})" for (_id, n, c) in yards])
-    else:
-        selected_idx = matches[0]
+def exchange_from_yard(db_path: str, yard_spot_name: str = None, num_to_move: int = None, conn=None):
+    with open_connection(db_path, conn) as conn:
+        cur = conn.cursor()
 
-    yard_id, yard_name, yard_capacity = yards[selected_idx]
+        # Choose yard (mirror exchange_yard inputs)
+        yards = fetch_yard_spots(cur)
+        if not yards:
+            print("No yard spots found in database.")
+            return
 
-    # Fetch cars currently in yard
-    yard_cars = fetch_yard_cars(cur, yard_id)
-    if not yard_cars:
-        print(f"No cars currently in Yard '{yard_name}'.")
-        conn.close()
-        return
-
-    print(f"Cars currently in Yard '{yard_name}':")
-    for i, (car_number, car_type_id, road_name) in enumerate(yard_cars, start=1):
-        print(f"  {i}. {road_name} {car_number}")
-
-    if num_to_move is None:
-        choice = input("Enter number of cars to pull from yard: ").strip().lower()
-        if choice == 'all':
-            num = len(yard_cars)
+        # If not provided via args, prompt like exchange_yard
+        if not yard_spot_name:
+            yard_spot_name = input("Enter Yard spot name: ").strip()
+
+        # find matching yard by name (case-insensitive)
+        matches = [i for i, y in enumerate(yards) if y[1].lower() == yard_spot_name.lower()]
+        if not matches:
+            print(f"Yard '{yard_spot_name}' not found. Available yards:")
+            for i, (_id, name, cap) in enumerate(yards, start=1):
+                print(f"  {i}. {name} (capacity={cap})")
+            selected_idx = choose_from_list("Select a yard:", [f"{n} (capacity={c})" for (_id, n, c) in yards])
         else:
-            try:
-                num = int(choice)
-            except ValueError:
-                print("Invalid number. Exiting.")
-                conn.close()
-                return
-        num_to_move = max(0, min(num, len(yard_cars)))
-
-    if num_to_move <= 0:
-        print("Nothing to move.")
-        conn.close()
-        return
+            selected_idx = matches[0]
+
+        yard_id, yard_name, yard_capacity = yards[selected_idx]
+
+        # Fetch cars currently in yard
+        yard_cars = fetch_yard_cars(cur, yard_id)
+        if not yard_cars:
+            print(f"No cars currently in Yard '{yard_name}'.")
+            return
+
+        print(f"Cars currently in Yard '{yard_name}':")
+        for i, (car_number, car_type_id, road_name) in enumerate(yard_cars, start=1):
+            print(f"  {i}. {road_name} {car_number}")
+
+        if num_to_move is None:
+            choice = input("Enter number of cars to pull from yard: ").strip().lower()
+            if choice == 'all':
+                num = len(yard_cars)
+            else:
+                try:
+                    num = int(choice)
+                except ValueError:
+                    print("Invalid number. Exiting.")
+                    return
+            num_to_move = max(0, min(num, len(yard_cars)))
+
+        if num_to_move <= 0:
+            print("Nothing to move.")
+            return
+
+        moved, displaced_to_yard, replaced_from_industries = run_immediate(
+            conn, lambda cur: move_cars_from_yard_in_tx(cur, yard_id, yard_name, yard_capacity, num_to_move)
+        )
+
+    print("\nDone. Summary of moves:")
+    if not moved:
+        print("  No cars were moved from the yard to industries.")
+    else:
+        for car_number, road, from_yard, to_spot in moved:
+            print(f"  {road} {car_number}: {from_yard} → {to_spot}")
+
+    # Summary of cars moved from Industries into the Yard
+    print("\nMoved to Yard from Industries:")
+    if not displaced_to_yard and not replaced_from_industries:
+        print("  No cars were moved from industries to the yard.")
+    else:
+        for car_number, road, origin in displaced_to_yard:
+            print(f"  {road} {car_number}: {origin} → {yard_name}")
+        for car_number, road, origin in replaced_from_industries:
+            print(f"  {road} {car_number}: {origin} → {yard_name}")
 
+
+def move_cars_from_yard_in_tx(cur, yard_id: int, yard_name: str, yard_capacity: int, num_to_move: int):
+    # Runs inside BEGIN IMMEDIATE. Yard contents and industry occupancy are
+    # re-read here, since another exchange may have committed since the prompt.
+    yard_cars = fetch_yard_cars(cur, yard_id)
     cars_to_move = yard_cars[:num_to_move]
+    if len(cars_to_move) < num_to_move:
+        print(f"Yard '{yard_name}' now holds {len(yard_cars)} car(s); moving {len(cars_to_move)}.")
 
     # Load industry spots, allowed types, car type names
     spots = fetch_industry_spots(cur)
+    occupancy_before = {spot[0]: spot[4] for spot in spots}
     allowed = fetch_spot_allowed_types(cur)
     car_type_names = fetch_car_type_names(cur)
 
     # Current yard occupancy
     cur.execute("SELECT COUNT(*) FROM cars WHERE spot_id = ?", (yard_id,))
     yard_current_count = cur.fetchone()[0]
+    occupancy_before[yard_id] = yard_current_count
 
-    # We'll perform updates within a transaction
     print(f"Preparing to move {len(cars_to_move)} car(s) from Yard '{yard_name}'.")
     moved: List[Tuple[str, str, str, str]] = []
     moved_to_spot_ids: List[int] = []
@@ -294,32 +320,27 @@ def exchange_from_yard(db_path: str, yard_spot_name: str = None, num_to_move: in
                     replaced_from_industries.append((car_number, road_name, industry_name + ' / ' + spot_name))
                     print(f"Moved {road_name} {car_number} from {industry_name} / {spot_name} → Yard '{yard_name}'")
 
-    conn.commit()
-    conn.close()
+    check_spot_capacity(cur, {spot_id: occupancy_before[spot_id] for spot_id in moved_to_spot_ids + [yard_id]})
+    return moved, displaced_to_yard, replaced_from_industries
 
-    print("\nDone. Summary of moves:")
-    if not moved:
-        print("  No cars were moved from the yard to industries.")
-    else:
-        for car_number, road, from_yard, to_spot in moved:
-            print(f"  {road} {car_number}: {from_yard} → {to_spot}")
 
-    # Summary of cars moved from Industries into the Yard
-    print("\nMoved to Yard from Industries:")
-    if not displaced_to_yard and not replaced_from_industries:
-        print("  No cars were moved from industries to the yard.")
-    else:
-        for car_number, road, origin in displaced_to_yard:
-            print(f"  {road} {car_number}: {origin} → {yard_name}")
-        for car_number, road, origin in replaced_from_industries:
-            print(f"  {road} {car_number}: {origin} → {yard_name}")
+# --- Command line (shared by this script and `railops exchange-industries`) ---
+DESCRIPTION = 'Move cars from a Yard to Industry spots respecting types and capacities'
+# Options exchange_from_yard prompts for when they are missing
+PROMPTED_OPTIONS = ('yard', 'num')
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description='Move cars from a Yard to Industry spots respecting types and capacities')
-    parser.add_argument('--db', default=str(DB_PATH), help='Path to SQLite DB (default: railcars.db)')
+def add_arguments(parser):
     parser.add_argument('--yard', help='Yard spot name to operate on')
     parser.add_argument('--num', type=int, help='Number of cars to move (default: prompt)')
-    args = parser.parse_args()
 
-    exchange_from_yard(args.db, yard_spot_name=args.yard, num_to_move=args.num)
+
+def run(args, conn=None):
+    exchange_from_yard(args.db, yard_spot_name=args.yard, num_to_move=args.num, conn=conn)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument('--db', default=str(DB_PATH), help='Path to SQLite DB (default: railcars.db)')
+    add_arguments(parser)
+    run(parser.parse_args())
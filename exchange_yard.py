@@ -1,15 +1,20 @@
-import sqlite3
 from pathlib import Path
 import argparse
 from typing import List
 
+from db_transaction import open_connection, run_immediate, check_spot_capacity
+
 DB_PATH = Path("railcars.db")
 
 
-def exchange_offlayout_to_yard(yard_spot_name: str, num_cars: int, industry_types_only: bool = False):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+def exchange_offlayout_to_yard(yard_spot_name: str, num_cars: int, industry_types_only: bool = False, db_path=DB_PATH, conn=None):
+    with open_connection(db_path, conn) as conn:
+        run_immediate(conn, lambda cur: exchange_offlayout_to_yard_in_tx(cur, yard_spot_name, num_cars, industry_types_only))
+    print("✅ Exchange complete.")
+
 
+def exchange_offlayout_to_yard_in_tx(cur, yard_spot_name: str, num_cars: int, industry_types_only: bool = False):
+    # Runs inside BEGIN IMMEDIATE: capacity and occupancy read here cannot change before COMMIT
     # --- 1. Get OFF_LAYOUT spot_id ---
     cur.execute("SELECT spot_id FROM car_spots WHERE spot_name = 'OFF_LAYOUT'")
     off_layout_row = cur.fetchone()
@@ -61,8 +66,6 @@ def exchange_offlayout_to_yard(yard_spot_name: str, num_cars: int, industry_type
     available_slots = capacity
     if available_slots <= 0:
         print(f"Yard '{yard_spot_name}' is at capacity ({capacity}); no cars pulled from OFF_LAYOUT.")
-        conn.commit()
-        conn.close()
         return
 
     to_move = min(num_cars, available_slots)
@@ -83,8 +86,6 @@ def exchange_offlayout_to_yard(yard_spot_name: str, num_cars: int, industry_type
         allowed_types = [r[0] for r in cur.fetchall()]
         if not allowed_types:
             print("No industry-used car types found; no cars will be pulled from OFF_LAYOUT.")
-            conn.commit()
-            conn.close()
             return
         placeholders = ",".join(["?" for _ in allowed_types])
         sql = f"""
@@ -119,22 +120,33 @@ def exchange_offlayout_to_yard(yard_spot_name: str, num_cars: int, industry_type
             )
             print(f"Moved car {road_name} {car_number} from OFF_LAYOUT → Yard '{yard_spot_name}'")
 
-    conn.commit()
-    conn.close()
-    print("✅ Exchange complete.")
+    check_spot_capacity(cur, {yard_id: len(current_yard_cars)})
 
-# --- Example usage ---
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='Exchange cars between OFF_LAYOUT and a Yard spot')
+
+# --- Command line (shared by this script and `railops exchange-yard`) ---
+DESCRIPTION = 'Exchange cars between OFF_LAYOUT and a Yard spot'
+# Options run() prompts for when they are missing
+PROMPTED_OPTIONS = ('yard', 'count')
+
+
+def add_arguments(parser):
     parser.add_argument('--yard', help='Yard spot name to pull cars into')
     parser.add_argument('--count', type=int, help='Number of cars to pull from OFF_LAYOUT')
     parser.add_argument('--industry-types-only', action='store_true', help='Only pull OFF_LAYOUT cars whose types are used by Industries')
-    args = parser.parse_args()
 
+
+def run(args, conn=None):
     yard_track_name = args.yard or input("Enter Yard spot name: ").strip()
     if args.count is None:
         num_to_move = int(input("Enter number of cars to pull from OFF_LAYOUT: ").strip())
     else:
         num_to_move = args.count
 
-    exchange_offlayout_to_yard(yard_track_name, num_to_move, industry_types_only=args.industry_types_only)
+    exchange_offlayout_to_yard(yard_track_name, num_to_move, industry_types_only=args.industry_types_only, db_path=args.db, conn=conn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument('--db', default=str(DB_PATH), help='Path to SQLite DB (default: railcars.db)')
+    add_arguments(parser)
+    run(parser.parse_args())
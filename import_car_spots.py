@@ -1,94 +1,126 @@
+import argparse
 import csv
-import sqlite3
 from pathlib import Path
 
+from db_transaction import open_connection, run_immediate
+from name_resolver import ResolutionReport, load_car_type_index, resolve_car_type, split_car_types
+
 DB_PATH = Path("railcars.db")
 CSV_PATH = Path("data/car_spots.csv")
 
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
-
-mode = input("Replace existing car spots or append? [R/A]: ").strip().upper()
-if mode not in ("R", "A"):
-    raise RuntimeError("Invalid choice. Enter R or A.")
-
-if mode == "R":
-    print("⚠️ Replacing existing car spots...")
-    cur.execute("DELETE FROM car_spots")
-    cur.execute("DELETE FROM industries")
-    cur.execute("DELETE FROM sqlite_sequence WHERE name IN ('car_spots','industries')")
-    conn.commit()
-
-with open(CSV_PATH, newline="", encoding="utf-8-sig") as f:
-    reader = csv.DictReader(f)
-    print("CSV columns detected:", reader.fieldnames)
-
-    for row in reader:
-        # --- Insert industry type ---
-        industry_type = row["industry_type"].strip()
-        cur.execute(
-            "INSERT OR IGNORE INTO industry_types (industry_type_name) VALUES (?)",
-            (industry_type,)
-        )
-        cur.execute(
-            "SELECT industry_type_id FROM industry_types WHERE industry_type_name = ?",
-            (industry_type,)
-        )
-        industry_type_id = cur.fetchone()[0]
-
-        # --- Insert industry ---
-        industry_name = row["industry_name"].strip()
-        cur.execute(
-            "INSERT OR IGNORE INTO industries (industry_name, industry_type_id) VALUES (?, ?)",
-            (industry_name, industry_type_id)
-        )
-        cur.execute(
-            "SELECT industry_id FROM industries WHERE industry_name = ?",
-            (industry_name,)
-        )
-        industry_id = cur.fetchone()[0]
-
-        # --- Insert car spot ---
-        spot_name = row["spot_name"].strip()
-        capacity = int(row["capacity"])
-        service_frequency = float(row["service_frequency"]) if row["service_frequency"] else None
-
-        cur.execute(
-            """
-            INSERT OR IGNORE INTO car_spots
-            (spot_id, spot_name, industry_id, capacity, service_frequency)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                int(row["spot_id"]),  # use CSV spot_id
-                spot_name,
-                industry_id,
-                capacity,
-                service_frequency
+
+def import_car_spots(db_path=DB_PATH, csv_path=CSV_PATH, mode: str = "A", conn=None):
+    # mode: "R" replaces existing car spots and industries, "A" appends
+    mode = mode.strip().upper()
+    if mode not in ("R", "A"):
+        raise RuntimeError("Invalid choice. Enter R or A.")
+
+    with open_connection(db_path, conn) as conn:
+        report = run_immediate(conn, lambda cur: import_car_spots_in_tx(cur, csv_path, mode))
+    report.print_report()
+    print("✅ Car spots imported successfully.")
+
+
+def import_car_spots_in_tx(cur, csv_path, mode: str):
+    # Replace-mode deletes and all inserts commit together, or not at all
+    if mode == "R":
+        print("⚠️ Replacing existing car spots...")
+        cur.execute("DELETE FROM spot_allowed_car_types")
+        cur.execute("DELETE FROM car_spots")
+        cur.execute("DELETE FROM industries")
+        cur.execute("DELETE FROM sqlite_sequence WHERE name IN ('car_spots','industries')")
+        # Older imports stored a whole "Boxcar, Flat Car" cell as one car type;
+        # drop those once nothing refers to them
+        cur.execute("""
+            DELETE FROM car_types
+            WHERE (car_type_name LIKE '%,%' OR car_type_name LIKE '%|%')
+              AND car_type_id NOT IN (SELECT car_type_id FROM cars)
+              AND car_type_id NOT IN (SELECT car_type_id FROM spot_allowed_car_types)
+        """)
+
+    # Allowed types resolve against the same normalized index import_cars uses,
+    # so "Tank car" here and "Tank Car" in cars.csv are one car type.
+    car_types = load_car_type_index(cur)
+    report = ResolutionReport()
+
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        print("CSV columns detected:", reader.fieldnames)
+
+        for row in reader:
+            # --- Insert industry type ---
+            industry_type = row["industry_type"].strip()
+            cur.execute(
+                "INSERT OR IGNORE INTO industry_types (industry_type_name) VALUES (?)",
+                (industry_type,)
             )
-        )
-
-        # --- Allowed car types ---
-        if row["allowed_car_types"]:
-            for ct in row["allowed_car_types"].split("|"):
-                ct = ct.strip()
-                if not ct:
-                    continue
-                cur.execute(
-                    "INSERT OR IGNORE INTO car_types (car_type_name) VALUES (?)",
-                    (ct,)
-                )
-                cur.execute(
-                    "SELECT car_type_id FROM car_types WHERE car_type_name = ?",
-                    (ct,)
+            cur.execute(
+                "SELECT industry_type_id FROM industry_types WHERE industry_type_name = ?",
+                (industry_type,)
+            )
+            industry_type_id = cur.fetchone()[0]
+
+            # --- Insert industry ---
+            industry_name = row["industry_name"].strip()
+            cur.execute(
+                "INSERT OR IGNORE INTO industries (industry_name, industry_type_id) VALUES (?, ?)",
+                (industry_name, industry_type_id)
+            )
+            cur.execute(
+                "SELECT industry_id FROM industries WHERE industry_name = ?",
+                (industry_name,)
+            )
+            industry_id = cur.fetchone()[0]
+
+            # --- Insert car spot ---
+            spot_name = row["spot_name"].strip()
+            capacity = int(row["capacity"])
+            service_frequency = float(row["service_frequency"]) if row["service_frequency"] else None
+
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO car_spots
+                (spot_id, spot_name, industry_id, capacity, service_frequency)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    int(row["spot_id"]),  # use CSV spot_id
+                    spot_name,
+                    industry_id,
+                    capacity,
+                    service_frequency
                 )
-                car_type_id = cur.fetchone()[0]
+            )
 
+            # --- Allowed car types ---
+            for ct in split_car_types(row["allowed_car_types"]):
+                car_type_id = resolve_car_type(cur, car_types, report, ct)
                 cur.execute(
                     "INSERT OR IGNORE INTO spot_allowed_car_types (spot_id, car_type_id) VALUES (?, ?)",
                     (int(row["spot_id"]), car_type_id)
                 )
 
-conn.commit()
-conn.close()
-print("✅ Car spots imported successfully.")
+    return report
+
+
+# --- Command line (shared by this script and `railops import-spots`) ---
+DESCRIPTION = "Import industries and car spots from CSV"
+# Options run() prompts for when they are missing
+PROMPTED_OPTIONS = ("mode",)
+
+
+def add_arguments(parser):
+    parser.add_argument("--csv", default=str(CSV_PATH), help="Path to car spots CSV (default: data/car_spots.csv)")
+    parser.add_argument("--mode", choices=("R", "A"), type=str.upper, help="Replace or append existing car spots (default: prompt)")
+
+
+def run(args, conn=None):
+    mode = args.mode or input("Replace existing car spots or append? [R/A]: ")
+    import_car_spots(args.db, args.csv, mode, conn=conn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--db", default=str(DB_PATH), help="Path to SQLite DB (default: railcars.db)")
+    add_arguments(parser)
+    run(parser.parse_args())
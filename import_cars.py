@@ -1,84 +1,109 @@
+import argparse
 import csv
-import sqlite3
 from pathlib import Path
 
+from db_transaction import open_connection, run_immediate
+from name_resolver import ResolutionReport, load_car_type_index, load_spot_index, normalize_name, resolve_car_type
+
 DB_PATH = Path("railcars.db")
 CSV_PATH = Path("data/cars.csv")
 
 OFF_LAYOUT_SPOT_NAME = "OFF_LAYOUT"
+# Spot values (after normalize_name) that mean "not on the layout"
+STAGING_NAMES = ("", "STAGING", normalize_name(OFF_LAYOUT_SPOT_NAME))
 
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
-
-mode = input("Replace existing cars or append? [R/A]: ").strip().upper()
-if mode not in ("R", "A"):
-    raise RuntimeError("Invalid choice. Enter R or A.")
-
-if mode == "R":
-    print("⚠️ Replacing existing cars...")
-    cur.execute("DELETE FROM cars")
-    cur.execute("DELETE FROM sqlite_sequence WHERE name='cars'")
-    conn.commit()
-
-with open(CSV_PATH, newline="", encoding="utf-8-sig") as f:
-    reader = csv.DictReader(f)
-    print("CSV columns detected:", reader.fieldnames)
-
-    for row in reader:
-        car_number = row["car_number"].strip()
-        car_type = row["car_type"].strip()
-        build_year = int(row["build_year"])
-        road_name = row["road_name"].strip()
-        status = row["status"].strip()
-
-        # --- Determine spot ---
-        raw_spot = row.get("spot_id", "").strip().upper()
-        if raw_spot in ("", "STAGING", "OFF_LAYOUT", "OFF-LAYOUT"):
-            target_spot = OFF_LAYOUT_SPOT_NAME
-        else:
-            target_spot = raw_spot
-
-        # Lookup spot_id
-        cur.execute(
-            "SELECT spot_id FROM car_spots WHERE UPPER(TRIM(spot_name)) = ?",
-            (target_spot.strip().upper(),)
-        )
-        result = cur.fetchone()
-
-        # If not found, assign OFF_LAYOUT (must exist)
-        if result is None:
-            print(f"⚠️ Spot '{raw_spot}' not found. Assigning to OFF_LAYOUT.")
-            cur.execute(
-                "SELECT spot_id FROM car_spots WHERE spot_name = ?",
-                (OFF_LAYOUT_SPOT_NAME,)
-            )
-            result = cur.fetchone()
-            if result is None:
-                raise RuntimeError("OFF_LAYOUT spot is missing from car_spots table")
-        spot_id = result[0]
-
-        # --- Insert car_type if needed ---
-        cur.execute(
-            "INSERT OR IGNORE INTO car_types (car_type_name) VALUES (?)",
-            (car_type,)
-        )
-        cur.execute(
-            "SELECT car_type_id FROM car_types WHERE car_type_name = ?",
-            (car_type,)
-        )
-        car_type_id = cur.fetchone()[0]
-
-        # --- Insert car ---
-        cur.execute(
-            """
-            INSERT INTO cars (
-                car_number, car_type_id, build_year, road_name, status, spot_id
-            )
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (car_number, car_type_id, build_year, road_name, status, spot_id)
+
+def import_cars(db_path=DB_PATH, csv_path=CSV_PATH, mode: str = "A", conn=None):
+    # mode: "R" replaces existing cars, "A" appends
+    mode = mode.strip().upper()
+    if mode not in ("R", "A"):
+        raise RuntimeError("Invalid choice. Enter R or A.")
+
+    with open_connection(db_path, conn) as conn:
+        report = run_immediate(conn, lambda cur: import_cars_in_tx(cur, csv_path, mode))
+    report.print_report(unresolved_note="(assigned to OFF_LAYOUT)")
+    print("✅ Cars imported successfully.")
+
+
+def import_cars_in_tx(cur, csv_path, mode: str):
+    # Replace-mode deletes and all inserts commit together, or not at all
+    if mode == "R":
+        print("⚠️ Replacing existing cars...")
+        cur.execute("DELETE FROM cars")
+        cur.execute("DELETE FROM sqlite_sequence WHERE name='cars'")
+
+    # One pass over car_spots and car_types up front; every row then resolves
+    # in memory, and misses are reported together once the import commits.
+    spots = load_spot_index(cur)
+    car_types = load_car_type_index(cur)
+    report = ResolutionReport()
+    off_layout_id = spots.get(OFF_LAYOUT_SPOT_NAME)
+    cars = []
+
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        print("CSV columns detected:", reader.fieldnames)
+
+        for row in reader:
+            car_number = row["car_number"].strip()
+            car_type = row["car_type"].strip()
+            build_year = int(row["build_year"])
+            road_name = row["road_name"].strip()
+            status = row["status"].strip()
+
+            # --- Determine spot ---
+            # data/cars.csv names the column initial_spot; older files used spot_id
+            raw_spot = (row.get("spot_id") or row.get("initial_spot") or "").strip()
+            spot_id = None
+            if normalize_name(raw_spot) not in STAGING_NAMES:
+                result = spots.resolve(raw_spot)
+                if result is None:
+                    report.record_unresolved("spot", raw_spot)
+                else:
+                    spot_id, canonical, distance = result
+                    if distance:
+                        report.record_fuzzy("spot", raw_spot, canonical)
+
+            # If not found, assign OFF_LAYOUT (must exist)
+            if spot_id is None:
+                if off_layout_id is None:
+                    raise RuntimeError("OFF_LAYOUT spot is missing from car_spots table")
+                spot_id = off_layout_id
+
+            car_type_id = resolve_car_type(cur, car_types, report, car_type)
+            cars.append((car_number, car_type_id, build_year, road_name, status, spot_id))
+
+    # --- Insert cars ---
+    cur.executemany(
+        """
+        INSERT INTO cars (
+            car_number, car_type_id, build_year, road_name, status, spot_id
         )
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        cars
+    )
+    return report
+
+
+# --- Command line (shared by this script and `railops import-cars`) ---
+DESCRIPTION = "Import railcars from CSV"
+# Options run() prompts for when they are missing
+PROMPTED_OPTIONS = ("mode",)
+
+
+def add_arguments(parser):
+    parser.add_argument("--csv", default=str(CSV_PATH), help="Path to cars CSV (default: data/cars.csv)")
+    parser.add_argument("--mode", choices=("R", "A"), type=str.upper, help="Replace or append existing cars (default: prompt)")
+
+
+def run(args, conn=None):
+    mode = args.mode or input("Replace existing cars or append? [R/A]: ")
+    import_cars(args.db, args.csv, mode, conn=conn)
+
 
-conn.commit()
-conn.close()
-print("✅ Cars imported successfully.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--db", default=str(DB_PATH), help="Path to SQLite DB (default: railcars.db)")
+    add_arguments(parser)
+    run(parser.parse_args())
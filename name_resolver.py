@@ -0,0 +1,199 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Edit distance allowed for a near-miss; shorter names get less (see max_distance_for)
+MAX_DISTANCE = 2
+
+_SEPARATORS = re.compile(r"[\s_\-]+")
+_NUMBERS = re.compile(r"\d+")
+
+
+def normalize_name(name: str) -> str:
+    # "  off-layout " and "OFF_LAYOUT" both become "OFF LAYOUT"
+    return _SEPARATORS.sub(" ", name.strip()).upper().strip()
+
+
+def split_car_types(raw: str) -> List[str]:
+    # data/car_spots.csv writes "Boxcar, Flat Car"; older files used "Boxcar|Flat Car"
+    return [ct.strip() for ct in re.split(r"[|,]", raw or "") if ct.strip()]
+
+
+def edit_distance(a: str, b: str) -> int:
+    # Levenshtein distance, two-row DP
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i]
+        for j, cb in enumerate(b, start=1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def max_distance_for(key: str, max_distance: int = MAX_DISTANCE) -> int:
+    return min(max_distance, max(1, len(key) // 4))
+
+
+class BKTree:
+    # Burkhard-Keller tree over normalized keys: a query at distance d only
+    # descends into children whose edge label is within d of the query's
+    # distance to the node, so near-miss lookups touch a small part of the tree.
+
+    def __init__(self, keys: Iterable[str] = ()):
+        self._root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: str):
+        if self._root is None:
+            self._root = (key, {})
+            return
+        node = self._root
+        while True:
+            d = edit_distance(key, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (key, {})
+                return
+            node = child
+
+    def search(self, key: str, max_distance: int) -> List[Tuple[int, str]]:
+        # All (distance, key) pairs within max_distance, closest first
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node_key, children = stack.pop()
+            d = edit_distance(key, node_key)
+            if d <= max_distance:
+                found.append((d, node_key))
+            for edge, child in children.items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        found.sort()
+        return found
+
+
+class NameIndex:
+    # Normalized name -> id, with O(1) exact lookups and a BK-tree fallback
+    # for near-misses. A fuzzy match is only accepted when it is unambiguous
+    # and keeps the same numbers, so "Lumber 6" never resolves to "Lumber 5".
+    # The tree is built on the first miss, so a clean import never pays for it.
+
+    def __init__(self, names: Iterable[Tuple[str, int]] = ()):
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[str, str] = {}
+        self._tree: Optional[BKTree] = None
+        for name, id_ in names:
+            self.add(name, id_)
+
+    def add(self, name: str, id_: int):
+        key = normalize_name(name)
+        if key in self._ids:
+            return
+        self._ids[key] = id_
+        self._names[key] = name
+        if self._tree is not None:
+            self._tree.add(key)
+
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(normalize_name(name))
+
+    def resolve(self, name: str, max_distance: int = MAX_DISTANCE) -> Optional[Tuple[int, str, int]]:
+        # Returns (id, canonical name, edit distance) or None
+        key = normalize_name(name)
+        if key in self._ids:
+            return self._ids[key], self._names[key], 0
+        if not key:
+            return None
+
+        if self._tree is None:
+            self._tree = BKTree(self._ids)
+        numbers = _NUMBERS.findall(key)
+        matches = [
+            (d, k) for d, k in self._tree.search(key, max_distance_for(key, max_distance))
+            if _NUMBERS.findall(k) == numbers
+        ]
+        if not matches:
+            return None
+        best = matches[0][0]
+        closest = {self._ids[k] for d, k in matches if d == best}
+        if len(closest) > 1:
+            return None
+        best_key = matches[0][1]
+        return self._ids[best_key], self._names[best_key], best
+
+
+class ResolutionReport:
+    # Collects fuzzy and failed lookups during an import so they can be
+    # printed once at the end instead of one warning per CSV row.
+
+    def __init__(self):
+        self.fuzzy: Dict[Tuple[str, str, str], int] = {}
+        self.unresolved: Dict[Tuple[str, str], int] = {}
+        self.created: Dict[Tuple[str, str], int] = {}
+
+    def record_fuzzy(self, kind: str, raw: str, matched: str):
+        key = (kind, raw, matched)
+        self.fuzzy[key] = self.fuzzy.get(key, 0) + 1
+
+    def record_unresolved(self, kind: str, raw: str):
+        key = (kind, raw)
+        self.unresolved[key] = self.unresolved.get(key, 0) + 1
+
+    def record_created(self, kind: str, name: str):
+        # Counts the row that created the name; later rows add via record_use
+        self.created[(kind, name)] = 1
+
+    def record_use(self, kind: str, name: str):
+        # A row resolved to `name`; only tracked for names this import created
+        key = (kind, name)
+        if key in self.created:
+            self.created[key] += 1
+
+    def print_report(self, unresolved_note: str = ""):
+        if not (self.fuzzy or self.unresolved or self.created):
+            return
+        print("\n=== NAME RESOLUTION REPORT ===")
+        if self.fuzzy:
+            print("Resolved by near match:")
+            for (kind, raw, matched), count in sorted(self.fuzzy.items()):
+                print(f"  {kind} '{raw}' → '{matched}' ({count} row(s))")
+        if self.unresolved:
+            print(f"Unresolved{' ' + unresolved_note if unresolved_note else ''}:")
+            for (kind, raw), count in sorted(self.unresolved.items()):
+                print(f"  {kind} '{raw}' ({count} row(s))")
+        if self.created:
+            print("New names added:")
+            for (kind, name), count in sorted(self.created.items()):
+                print(f"  {kind} '{name}' ({count} row(s))")
+        print("==============================")
+
+
+def load_spot_index(cur) -> NameIndex:
+    cur.execute("SELECT spot_name, spot_id FROM car_spots")
+    return NameIndex(cur.fetchall())
+
+
+def load_car_type_index(cur) -> NameIndex:
+    cur.execute("SELECT car_type_name, car_type_id FROM car_types")
+    return NameIndex(cur.fetchall())
+
+
+def resolve_car_type(cur, index: NameIndex, report: ResolutionReport, name: str) -> int:
+    # Existing type (exact or near match), otherwise a new car_types row
+    result = index.resolve(name)
+    if result is not None:
+        car_type_id, canonical, distance = result
+        if distance:
+            report.record_fuzzy("car type", name, canonical)
+        report.record_use("car type", canonical)
+        return car_type_id
+    cur.execute("INSERT INTO car_types (car_type_name) VALUES (?)", (name,))
+    index.add(name, cur.lastrowid)
+    report.record_created("car type", name)
+    return cur.lastrowid
@@ -0,0 +1,130 @@
+import argparse
+import importlib
+import os
+import shlex
+import sys
+
+# Only the subcommand name is parsed up front. The chosen module is then
+# imported and builds its own arguments (add_arguments) and runs (run), so
+# `railops summarize` never loads the import or exchange code, and each
+# script's own command line and its railops subcommand stay identical.
+
+DEFAULT_DB = os.environ.get("RAILOPS_DB", "railcars.db")
+
+# subcommand -> (module, one-line help)
+COMMANDS = {
+    "import-cars": ("import_cars", "Import railcars from CSV"),
+    "import-spots": ("import_car_spots", "Import industries and car spots from CSV"),
+    "exchange-yard": ("exchange_yard", "Exchange cars between OFF_LAYOUT and a Yard spot"),
+    "exchange-industries": ("exchange_industries", "Move cars from a Yard to Industry spots"),
+    "summarize": ("summarize_car_locations", "Summarize locations of railcars on the layout"),
+}
+
+
+class Session:
+    # Config and the one connection shared by every subcommand in a run
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            from db_transaction import connect
+            self._conn = connect(self.db_path)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def run_command(words, session: Session, batch_line: str = None):
+    # Run one subcommand. batch_line ("file:lineno") marks a batch run, where
+    # nothing may prompt: stdin is the script itself, or nobody is watching.
+    name, rest = words[0], words[1:]
+    where = f"{batch_line}: " if batch_line else ""
+    if name not in COMMANDS:
+        sys.exit(f"{where}unknown command '{name}' (choose from {', '.join(COMMANDS)})")
+
+    module = importlib.import_module(COMMANDS[name][0])
+    parser = argparse.ArgumentParser(prog=f"railops {name}", description=module.DESCRIPTION)
+    module.add_arguments(parser)
+    try:
+        args = parser.parse_args(rest)
+    except SystemExit as e:
+        if batch_line and e.code:
+            sys.exit(f"{where}invalid arguments for '{name}'")
+        raise
+    args.db = session.db_path
+
+    if batch_line:
+        missing = [opt for opt in module.PROMPTED_OPTIONS if getattr(args, opt) is None]
+        if missing:
+            options = ", ".join("--" + opt.replace("_", "-") for opt in missing)
+            sys.exit(f"{where}'{name}' would prompt in batch mode; pass {options}")
+        # e.g. summarize --watch never returns, so later lines would never run
+        endless = [opt for opt in getattr(module, "LONG_RUNNING_OPTIONS", ()) if getattr(args, opt)]
+        if endless:
+            options = ", ".join("--" + opt.replace("_", "-") for opt in endless)
+            sys.exit(f"{where}'{name}' with {options} never returns; not allowed in batch mode")
+        try:
+            module.run(args, conn=session.conn)
+        except EOFError:
+            # e.g. an unknown --yard makes exchange-industries offer a menu
+            sys.exit(f"{where}'{name}' asked for interactive input; check its options")
+        return
+
+    module.run(args, conn=session.conn)
+
+
+def run_batch(script: str, session: Session):
+    # Run a script of subcommands, one per line, on this process's session.
+    # Blank lines and lines starting with '#' are skipped; stops at the first failure.
+    if script == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(script, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    for lineno, line in enumerate(lines, start=1):
+        words = shlex.split(line, comments=True)
+        if not words:
+            continue
+        print(f"\n>>> {line.strip()}")
+        run_command(words, session, batch_line=f"{script}:{lineno}")
+
+
+def build_parser():
+    commands = "\n".join(f"  {name:<21} {help_}" for name, (_module, help_) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog="railops",
+        description="Model railroad car operations",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"commands:\n{commands}\n  {'batch FILE':<21} Run a file of commands in one process and connection ('-' for stdin)\n\n"
+               "Run 'railops COMMAND --help' for a command's options."
+    )
+    parser.add_argument("--db", default=DEFAULT_DB, help="Path to SQLite DB (default: $RAILOPS_DB or railcars.db)")
+    parser.add_argument("command", choices=[*COMMANDS, "batch"], metavar="COMMAND")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    session = Session(args.db)
+    try:
+        if args.command == "batch":
+            if len(args.args) != 1:
+                sys.exit("usage: railops batch FILE")
+            run_batch(args.args[0], session)
+        else:
+            run_command([args.command] + args.args, session)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -44,3 +44,96 @@ CREATE TABLE cars (
     FOREIGN KEY (car_type_id) REFERENCES car_types(car_type_id),
     FOREIGN KEY (spot_id) REFERENCES car_spots(spot_id)
 );
+
+-- Change tracking for `summarize_car_locations.py --watch`. Triggers stamp
+-- every spot a car enters or leaves with a rising version, and bump a layout
+-- counter whenever spots or industries are added, renamed or re-typed.
+CREATE TABLE spot_versions (
+    spot_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE INDEX idx_spot_versions_version ON spot_versions(version);
+CREATE INDEX idx_cars_spot_id ON cars(spot_id);
+
+CREATE TABLE layout_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TRIGGER cars_insert_spot_version AFTER INSERT ON cars
+WHEN NEW.spot_id IS NOT NULL
+BEGIN
+    INSERT OR REPLACE INTO spot_versions (spot_id, version)
+    VALUES (NEW.spot_id, (SELECT COALESCE(MAX(version), 0) + 1 FROM spot_versions));
+END;
+
+CREATE TRIGGER cars_delete_spot_version AFTER DELETE ON cars
+WHEN OLD.spot_id IS NOT NULL
+BEGIN
+    INSERT OR REPLACE INTO spot_versions (spot_id, version)
+    VALUES (OLD.spot_id, (SELECT COALESCE(MAX(version), 0) + 1 FROM spot_versions));
+END;
+
+CREATE TRIGGER cars_update_spot_version AFTER UPDATE OF spot_id, road_name, car_number ON cars
+BEGIN
+    INSERT OR REPLACE INTO spot_versions (spot_id, version)
+    SELECT OLD.spot_id, (SELECT COALESCE(MAX(version), 0) + 1 FROM spot_versions)
+    WHERE OLD.spot_id IS NOT NULL;
+    INSERT OR REPLACE INTO spot_versions (spot_id, version)
+    SELECT NEW.spot_id, (SELECT COALESCE(MAX(version), 0) + 1 FROM spot_versions)
+    WHERE NEW.spot_id IS NOT NULL;
+END;
+
+CREATE TRIGGER car_spots_insert_layout_version AFTER INSERT ON car_spots
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('car_spots', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER car_spots_update_layout_version AFTER UPDATE ON car_spots
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('car_spots', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER car_spots_delete_layout_version AFTER DELETE ON car_spots
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('car_spots', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER industries_insert_layout_version AFTER INSERT ON industries
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('industries', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER industries_update_layout_version AFTER UPDATE ON industries
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('industries', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER industries_delete_layout_version AFTER DELETE ON industries
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('industries', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER industry_types_insert_layout_version AFTER INSERT ON industry_types
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('industry_types', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER industry_types_update_layout_version AFTER UPDATE ON industry_types
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('industry_types', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER industry_types_delete_layout_version AFTER DELETE ON industry_types
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('industry_types', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
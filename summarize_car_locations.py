@@ -1,32 +1,42 @@
 import sqlite3
 import argparse
+import json
 import sys
+import time
+from typing import Dict, List, Tuple
+
+from db_transaction import open_connection
+
+
+def selected_industry_types(show_yards=True, show_industries=True) -> List[str]:
+    # Off-Layout / Staging is never shown
+    if show_yards and not show_industries:
+        return ["Yard"]
+    if show_industries and not show_yards:
+        return ["Industry"]
+    return ["Yard", "Industry"]
 
 
 def summarize_car_locations(
     db_path,
     show_yards=True,
-    show_industries=True
+    show_industries=True,
+    conn=None
 ):
     if not show_yards and not show_industries:
         print("Nothing to display (yards and industries both disabled).")
         return
 
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
+    with open_connection(db_path, conn) as conn:
+        rows = fetch_car_locations(conn.cursor(), show_yards, show_industries)
 
-    filters = []
-    # Always exclude Off-Layout / Staging
-    filters.append("it.industry_type_name != 'Off-Layout'")
+    print_car_summary(rows)
 
-    if show_yards and not show_industries:
-        filters.append("it.industry_type_name = 'Yard'")
-    elif show_industries and not show_yards:
-        filters.append("it.industry_type_name = 'Industry'")
-    else:
-        filters.append("it.industry_type_name IN ('Yard','Industry')")
 
-    where_clause = "WHERE " + " AND ".join(filters)
+def fetch_car_locations(cur, show_yards=True, show_industries=True):
+    industry_types = selected_industry_types(show_yards, show_industries)
+    placeholders = ",".join(["?" for _ in industry_types])
+    where_clause = f"WHERE it.industry_type_name IN ({placeholders})"
 
     cur.execute(f"""
         SELECT
@@ -46,11 +56,12 @@ def summarize_car_locations(
             cs.spot_name,
             c.road_name,
             c.car_number
-    """)
+    """, industry_types)
+
+    return cur.fetchall()
 
-    rows = cur.fetchall()
-    conn.close()
 
+def print_car_summary(rows):
     if not rows:
         print("No cars found for the selected filters.")
         return
@@ -82,16 +93,242 @@ def summarize_car_locations(
     print("\n============================\n")
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Summarize locations of railcars on the layout"
-    )
-    parser.add_argument(
-        "--db",
-        default="railcars.db",
-        help="Path to SQLite database (default: railcars.db)"
-    )
+def fetch_spot_labels(cur) -> Dict[int, Tuple[str, str, str]]:
+    # spot_id -> (industry_type_name, industry_name, spot_name)
+    cur.execute("""
+        SELECT cs.spot_id, it.industry_type_name, i.industry_name, cs.spot_name
+        FROM car_spots cs
+        JOIN industries i ON cs.industry_id = i.industry_id
+        JOIN industry_types it ON i.industry_type_id = it.industry_type_id
+    """)
+    return {r[0]: (r[1], r[2], r[3]) for r in cur.fetchall()}
+
+
+# Per-spot change tracking for watch mode lives in schema.sql: triggers stamp
+# every spot a car enters or leaves with a rising version, and bump a layout
+# counter whenever spots or industries are added, renamed or re-typed. The
+# watcher then asks only for spots with a version newer than the last one it
+# saw. This copy migrates databases built before those tables existed.
+CHANGE_TRACKING_SQL = """
+CREATE TABLE IF NOT EXISTS spot_versions (
+    spot_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_spot_versions_version ON spot_versions(version);
+CREATE INDEX IF NOT EXISTS idx_cars_spot_id ON cars(spot_id);
+
+CREATE TABLE IF NOT EXISTS layout_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS cars_insert_spot_version AFTER INSERT ON cars
+WHEN NEW.spot_id IS NOT NULL
+BEGIN
+    INSERT OR REPLACE INTO spot_versions (spot_id, version)
+    VALUES (NEW.spot_id, (SELECT COALESCE(MAX(version), 0) + 1 FROM spot_versions));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cars_delete_spot_version AFTER DELETE ON cars
+WHEN OLD.spot_id IS NOT NULL
+BEGIN
+    INSERT OR REPLACE INTO spot_versions (spot_id, version)
+    VALUES (OLD.spot_id, (SELECT COALESCE(MAX(version), 0) + 1 FROM spot_versions));
+END;
+
+CREATE TRIGGER IF NOT EXISTS cars_update_spot_version AFTER UPDATE OF spot_id, road_name, car_number ON cars
+BEGIN
+    INSERT OR REPLACE INTO spot_versions (spot_id, version)
+    SELECT OLD.spot_id, (SELECT COALESCE(MAX(version), 0) + 1 FROM spot_versions)
+    WHERE OLD.spot_id IS NOT NULL;
+    INSERT OR REPLACE INTO spot_versions (spot_id, version)
+    SELECT NEW.spot_id, (SELECT COALESCE(MAX(version), 0) + 1 FROM spot_versions)
+    WHERE NEW.spot_id IS NOT NULL;
+END;
+"""
+
+LAYOUT_TABLES = ("car_spots", "industries", "industry_types")
+
+
+def ensure_change_tracking(cur):
+    # Migration for databases created from an older schema.sql; a no-op otherwise
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spot_versions'")
+    if cur.fetchone():
+        return
+    script = CHANGE_TRACKING_SQL
+    for table in LAYOUT_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            script += f"""
+CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_layout_version AFTER {event} ON {table}
+BEGIN
+    INSERT INTO layout_versions (table_name, version) VALUES ('{table}', 1)
+    ON CONFLICT(table_name) DO UPDATE SET version = version + 1;
+END;
+"""
+    cur.executescript(script)
+
+
+def fetch_layout_version(cur) -> int:
+    cur.execute("SELECT COALESCE(SUM(version), 0) FROM layout_versions")
+    return cur.fetchone()[0]
+
+
+def fetch_changed_spots(cur, since: int) -> Tuple[List[int], int]:
+    # Spots stamped after `since`, and the newest stamp seen
+    cur.execute("SELECT spot_id, version FROM spot_versions WHERE version > ?", (since,))
+    rows = cur.fetchall()
+    newest = max([since] + [version for _spot_id, version in rows])
+    return [spot_id for spot_id, _version in rows], newest
+
+
+def fetch_spot_occupancy(cur, spot_ids=None) -> Dict[int, Tuple[Tuple[str, str], ...]]:
+    # spot_id -> (road_name, car_number) pairs in summary order; reads only the
+    # cars table, and only the given spots when spot_ids is passed
+    if spot_ids is None:
+        cur.execute("SELECT spot_id, road_name, car_number FROM cars WHERE spot_id IS NOT NULL")
+        rows = cur.fetchall()
+    else:
+        spot_ids = list(spot_ids)
+        rows = []
+        # Chunked to stay under SQLite's bound-parameter limit after a bulk import
+        for i in range(0, len(spot_ids), 500):
+            chunk = spot_ids[i:i + 500]
+            placeholders = ",".join(["?" for _ in chunk])
+            cur.execute(f"SELECT spot_id, road_name, car_number FROM cars WHERE spot_id IN ({placeholders})", chunk)
+            rows.extend(cur.fetchall())
+    d: Dict[int, List[Tuple[str, str]]] = {}
+    for spot_id, road_name, car_number in rows:
+        d.setdefault(spot_id, []).append((road_name, car_number))
+    # SQLite sorts NULL road names first; match that so redraw equals the one-shot summary
+    return {
+        spot_id: tuple(sorted(cars, key=lambda c: (c[0] is not None, c[0] or "", c[1])))
+        for spot_id, cars in d.items()
+    }
+
+
+def occupancy_rows(labels, occupancy, industry_types) -> List[Tuple[str, str, str, str, str]]:
+    # Same shape and ordering as the summary query, built from the cached state
+    rows = []
+    for spot_id in sorted(occupancy, key=lambda spot_id: labels.get(spot_id, ("", "", ""))):
+        label = labels.get(spot_id)
+        if label is None or label[0] not in industry_types:
+            continue
+        for road, number in occupancy[spot_id]:
+            rows.append((label[0], label[1], label[2], road, number))
+    return rows
+
 
+def watch_car_locations(
+    db_path,
+    show_yards=True,
+    show_industries=True,
+    interval=2.0,
+    output="redraw"
+):
+    if not show_yards and not show_industries:
+        print("Nothing to display (yards and industries both disabled).")
+        return
+
+    industry_types = selected_industry_types(show_yards, show_industries)
+
+    # One long-lived connection: PRAGMA data_version only changes when another
+    # connection commits, so polling it costs nothing while the layout is idle.
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    ensure_change_tracking(cur)
+
+    labels = fetch_spot_labels(cur)
+    layout_version = fetch_layout_version(cur)
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM spot_versions")
+    spot_version = cur.fetchone()[0]
+    occupancy = fetch_spot_occupancy(cur)
+    cur.execute("PRAGMA data_version")
+    last_version = cur.fetchone()[0]
+
+    # spot_id -> (label, cars) as the output currently shows it
+    shown: Dict[int, Tuple[Tuple[str, str, str], Tuple[Tuple[str, str], ...]]] = {}
+
+    def report(spot_ids, force_redraw=False):
+        # Compare each candidate spot with what was last shown; a spot that is
+        # emptied, deleted or re-typed out of view is reported as removed
+        changes = []
+        for spot_id in sorted(spot_ids):
+            label = labels.get(spot_id)
+            cars = occupancy.get(spot_id, ())
+            new = (label, cars) if label is not None and label[0] in industry_types and cars else None
+            old = shown.get(spot_id)
+            if new == old:
+                continue
+            changes.append((spot_id, old, new))
+            if new is None:
+                del shown[spot_id]
+            else:
+                shown[spot_id] = new
+
+        if output == "ndjson":
+            for spot_id, old, new in changes:
+                label, after = new if new is not None else (old[0], ())
+                before = {number for _road, number in old[1]} if old is not None else set()
+                industry_type, industry, spot = label
+                print(json.dumps({
+                    "spot_id": spot_id,
+                    "industry_type": industry_type,
+                    "industry": industry,
+                    "spot": spot,
+                    "cars": [{"road_name": road, "car_number": number} for road, number in after],
+                    "added": sorted(number for _road, number in after if number not in before),
+                    "removed": sorted(before - {number for _road, number in after}),
+                }))
+        elif changes or force_redraw:
+            # Clear screen and move the cursor home before redrawing
+            print("\033[2J\033[H", end="")
+            print_car_summary(occupancy_rows(labels, occupancy, industry_types))
+        sys.stdout.flush()
+
+    try:
+        # Initial snapshot: nothing shown yet, so every displayed car is added
+        report(occupancy, force_redraw=True)
+
+        while True:
+            time.sleep(interval)
+            cur.execute("PRAGMA data_version")
+            version = cur.fetchone()[0]
+            if version == last_version:
+                continue
+            last_version = version
+
+            changed, spot_version = fetch_changed_spots(cur, spot_version)
+            current = fetch_spot_occupancy(cur, changed)
+            for spot_id in changed:
+                if current.get(spot_id):
+                    occupancy[spot_id] = current[spot_id]
+                else:
+                    occupancy.pop(spot_id, None)
+            candidates = set(changed)
+
+            new_layout_version = fetch_layout_version(cur)
+            if new_layout_version != layout_version:
+                # Spots may have been renamed or re-typed under the same spot_ids
+                layout_version = new_layout_version
+                labels = fetch_spot_labels(cur)
+                candidates |= set(occupancy) | set(shown)
+
+            report(candidates)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+# --- Command line (shared by this script and `railops summarize`) ---
+DESCRIPTION = "Summarize locations of railcars on the layout"
+# Nothing here prompts
+PROMPTED_OPTIONS = ()
+# Options that keep the command running until interrupted
+LONG_RUNNING_OPTIONS = ("watch",)
+
+
+def add_arguments(parser):
     group = parser.add_mutually_exclusive_group()
     group.add_argument(
         "--yards",
@@ -104,8 +341,26 @@ def main():
         help="Show only industry cars"
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and report occupancy changes as they happen"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="Seconds between change checks in watch mode (default: 2)"
+    )
+    parser.add_argument(
+        "--output",
+        choices=("redraw", "ndjson"),
+        default="redraw",
+        help="Watch mode output: redraw the summary or stream NDJSON per-spot diffs (default: redraw)"
+    )
+
 
+def run(args, conn=None):
     show_yards = True
     show_industries = True
 
@@ -114,11 +369,35 @@ def main():
     elif args.industries:
         show_yards = False
 
+    if args.watch:
+        # Watch mode keeps its own connection: PRAGMA data_version only
+        # reports commits made by other connections.
+        watch_car_locations(
+            db_path=args.db,
+            show_yards=show_yards,
+            show_industries=show_industries,
+            interval=args.interval,
+            output=args.output
+        )
+        return
+
     summarize_car_locations(
         db_path=args.db,
         show_yards=show_yards,
-        show_industries=show_industries
+        show_industries=show_industries,
+        conn=conn
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument(
+        "--db",
+        default="railcars.db",
+        help="Path to SQLite database (default: railcars.db)"
     )
+    add_arguments(parser)
+    run(parser.parse_args())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+import contextlib
+import io
+import multiprocessing
+import random
+import shutil
+import sqlite3
+import threading
+import traceback
+from pathlib import Path
+
+import exchange_industries
+from exchange_industries import exchange_from_yard
+from exchange_yard import exchange_offlayout_to_yard
+
+DB_PATH = Path(__file__).parent / "railcars.db"
+YARDS = ["Yard 1", "Yard 2", "Yard 3"]
+WORKERS = 16
+EXCHANGES_PER_WORKER = 15
+# Long enough for both racers to finish reading, well under the busy timeout
+BARRIER_TIMEOUT = 1.0
+
+
+def run_exchanges(args):
+    # One worker process: a random mix of both exchanges across every yard.
+    # Returns the traceback of the first failure, or None.
+    db_path, seed = args
+    rng = random.Random(seed)
+    random.seed(seed)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(EXCHANGES_PER_WORKER):
+                yard = rng.choice(YARDS)
+                if rng.random() < 0.5:
+                    exchange_offlayout_to_yard(yard, rng.randint(1, 8), db_path=db_path)
+                else:
+                    exchange_from_yard(db_path, yard, rng.randint(1, 5))
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def over_capacity_spots(db_path):
+    conn = sqlite3.connect(db_path)
+    over = conn.execute("""
+        SELECT cs.spot_name, cs.capacity, COUNT(*)
+        FROM cars c
+        JOIN car_spots cs ON c.spot_id = cs.spot_id
+        GROUP BY c.spot_id
+        HAVING COUNT(*) > cs.capacity
+    """).fetchall()
+    conn.close()
+    return over
+
+
+def exchange_after_barrier(db_path, yard, barrier, results):
+    # One racer: read the industry spots, then wait for the other racer to
+    # have read them too before deciding where to put the car. If the reads
+    # are not under the write lock, both pick the same last free spot.
+    fetch_industry_spots = exchange_industries.fetch_industry_spots
+
+    def fetch_then_wait(cur):
+        spots = fetch_industry_spots(cur)
+        try:
+            barrier.wait(timeout=BARRIER_TIMEOUT)
+        except threading.BrokenBarrierError:
+            # The other racer is blocked on the write lock: reads are serialized
+            pass
+        return spots
+
+    exchange_industries.fetch_industry_spots = fetch_then_wait
+    random.seed(0)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            exchange_from_yard(db_path, yard, 1)
+    except Exception:
+        results.put(traceback.format_exc())
+        return
+    results.put(None)
+
+
+def test_interleaved_exchanges_cannot_double_book_last_spot(tmp_path):
+    db_path = str(tmp_path / "railcars.db")
+    shutil.copy(DB_PATH, db_path)
+
+    # Fill every industry spot but one, and let that one take any car type
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        UPDATE car_spots
+        SET capacity = (SELECT COUNT(*) FROM cars c WHERE c.spot_id = car_spots.spot_id)
+        WHERE industry_id IN (
+            SELECT i.industry_id
+            FROM industries i
+            JOIN industry_types it ON i.industry_type_id = it.industry_type_id
+            WHERE it.industry_type_name = 'Industry'
+        )
+    """)
+    last_spot_id = conn.execute("""
+        SELECT cs.spot_id
+        FROM car_spots cs
+        JOIN industries i ON cs.industry_id = i.industry_id
+        JOIN industry_types it ON i.industry_type_id = it.industry_type_id
+        WHERE it.industry_type_name = 'Industry'
+        ORDER BY cs.spot_id
+        LIMIT 1
+    """).fetchone()[0]
+    conn.execute("UPDATE car_spots SET capacity = capacity + 1 WHERE spot_id = ?", (last_spot_id,))
+    conn.execute("DELETE FROM spot_allowed_car_types WHERE spot_id = ?", (last_spot_id,))
+    conn.commit()
+    conn.close()
+
+    barrier = multiprocessing.Barrier(2)
+    results = multiprocessing.Queue()
+    racers = [
+        multiprocessing.Process(target=exchange_after_barrier, args=(db_path, yard, barrier, results))
+        for yard in YARDS[:2]
+    ]
+    for racer in racers:
+        racer.start()
+    errors = [results.get(timeout=30) for _ in racers]
+    for racer in racers:
+        racer.join()
+
+    assert [e for e in errors if e] == []
+    assert over_capacity_spots(db_path) == []
+
+
+def test_concurrent_exchanges_never_exceed_capacity(tmp_path):
+    db_path = str(tmp_path / "railcars.db")
+    shutil.copy(DB_PATH, db_path)
+
+    with multiprocessing.Pool(WORKERS) as pool:
+        errors = pool.map(run_exchanges, [(db_path, seed) for seed in range(WORKERS)])
+
+    assert [e for e in errors if e] == []
+    assert over_capacity_spots(db_path) == []